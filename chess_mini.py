@@ -1,6 +1,10 @@
+import os
+import random
 import sys
+from array import array
+
 import pygame
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 # ------------------------------
 # Config & Constants
@@ -11,105 +15,305 @@ BOARD_SIZE = 8
 SQ_SIZE = WIDTH // BOARD_SIZE
 FPS = 60
 
+AI_DEPTH = 3  # kedalaman maksimum iterative deepening
+MATE_SCORE = 1000  # skor bila raja sudah dimakan (pseudolegal: raja bisa tertangkap)
+TT_CAP = 200_000  # jumlah entri maksimum transposition table sebelum dikosongkan
+MOVE_BUF_SIZE = 256  # slot move per posisi (maks. pseudolegal move < 256)
+MAX_PLY = 64  # kedalaman maksimum buffer move bersama di pencarian
+
 WHITE = (238, 238, 210)
 GREEN = (118, 150, 86)
 HIGHLIGHT = (246, 246, 105)
 MOVE_HINT = (187, 203, 43)
+CAPTURE_HINT = (180, 50, 50)
 TEXT_COLOR = (20, 20, 20)
 
-PIECE_VALUES = {
-    'P': 1,
-    'N': 3,
-    'B': 3,
-    'R': 5,
-    'Q': 9,
-    'K': 0  # King tidak dinilai untuk evaluasi material sederhana
-}
-
-UNICODE_PIECES = {
-    ('w', 'K'): '♔',
-    ('w', 'Q'): '♕',
-    ('w', 'R'): '♖',
-    ('w', 'B'): '♗',
-    ('w', 'N'): '♘',
-    ('w', 'P'): '♙',
-    ('b', 'K'): '♚',
-    ('b', 'Q'): '♛',
-    ('b', 'R'): '♜',
-    ('b', 'B'): '♝',
-    ('b', 'N'): '♞',
-    ('b', 'P'): '♟',
-}
+# File cache path font hasil resolve get_font(), agar run berikutnya tidak scan font sistem
+FONT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".chess_mini_font")
+
+# Jenis bidak (tanpa warna)
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+
+# Diindeks dengan jenis bidak
+PIECE_VALUES = [
+    0,
+    1,  # P
+    3,  # N
+    3,  # B
+    5,  # R
+    9,  # Q
+    0,  # K tidak dinilai untuk evaluasi material sederhana
+]
+# Nilai untuk pengurutan MVV-LVA: raja tertinggi (menangkap raja = menang, raja penyerang dicoba terakhir)
+ORDER_VALUES = PIECE_VALUES[:KING] + [100]
+
+# Diindeks dengan id bidak (lihat Core Data Structures)
+UNICODE_PIECES = [
+    '',
+    '♙', '♘', '♗', '♖', '♕', '♔',  # putih P N B R Q K
+    '♟', '♞', '♝', '♜', '♛', '♚',  # hitam P N B R Q K
+]
 
 # ------------------------------
 # Core Data Structures
 # ------------------------------
 
-Piece = Tuple[str, str]  # (color, type) e.g. ('w','P'), ('b','Q')
-Move = Tuple[Tuple[int, int], Tuple[int, int], Optional[Piece]]  # ((r1,c1),(r2,c2),captured_piece)
+Piece = int  # 0 = kosong, 1..6 = putih P N B R Q K, 7..12 = hitam P N B R Q K
+Move = int  # from | to << 6 | captured << 12 | promo << 16 (square 0..63, id bidak 0..12)
+
+EMPTY = 0
+W_P, W_N, W_B, W_R, W_Q, W_K = 1, 2, 3, 4, 5, 6
+B_P, B_N, B_B, B_R, B_Q, B_K = 7, 8, 9, 10, 11, 12
+NUM_PIECES = 13  # termasuk EMPTY
+
+# Warna sebagai int, dipakai langsung sebagai index tabel per warna
+W, B = 0, 1
+ENEMY = (B, W)
+PROMO_RANK = (0, BOARD_SIZE - 1)  # rank promosi pion
+
+# Lookup per id bidak
+PIECE_COLOR = [-1] + [W] * 6 + [B] * 6
+PIECE_TYPE = [EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING]
+COLOR_OFFSET = (0, 6)  # id bidak = COLOR_OFFSET[color] + jenis
+
+# Zobrist hashing: satu kunci acak 64-bit per (bidak, square) + kunci giliran hitam
+ZOBRIST: List[List[int]] = [
+    [random.getrandbits(64) for _ in range(BOARD_SIZE * BOARD_SIZE)] for _ in range(NUM_PIECES)
+]
+ZOBRIST_BLACK = random.getrandbits(64)
+ZOBRIST_SIDE = (0, ZOBRIST_BLACK)  # di-xor ke hash menurut giliran
+
+# Koordinat (r, c) per square, dibuat sekali agar hot path tidak membuat tuple baru
+SQ_RC: List[Tuple[int, int]] = [divmod(sq, BOARD_SIZE) for sq in range(BOARD_SIZE * BOARD_SIZE)]
+
+
+def mk_move(frm: int, to: int, captured: Piece = EMPTY, promo: Piece = EMPTY) -> Move:
+    return frm | (to << 6) | (captured << 12) | (promo << 16)
+
+
+def move_from(move: Move) -> int:
+    return move & 0x3F
+
+
+def move_to(move: Move) -> int:
+    return (move >> 6) & 0x3F
+
+
+def move_captured(move: Move) -> Piece:
+    return (move >> 12) & 0xF
+
+
+def move_promo(move: Move) -> Piece:
+    return move >> 16
 
 
 class Board:
     """
-    Representasi papan catur 8x8.
+    Representasi papan catur 8x8 berbasis bitboard.
+    Satu integer 64-bit per id bidak, bit ke-(r*8 + c) menyala bila petak terisi,
+    ditambah mailbox 64 petak (id bidak per square) untuk lookup O(1).
     Menyimpan state bidak dan menyediakan utilitas untuk memanipulasi state.
     """
     def __init__(self):
-        # Matriks 8x8: None atau Piece
-        self.grid: List[List[Optional[Piece]]] = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        # Bitboard per id bidak (index 0 tidak dipakai) + occupancy per warna
+        self.bb: List[int] = [0] * NUM_PIECES
+        self.squares = array('b', [EMPTY] * (BOARD_SIZE * BOARD_SIZE))
+        self.occ: List[int] = [0, 0]
+        self.hash = 0  # Zobrist hash posisi, di-update incremental oleh _toggle
+        self.material: List[int] = [0, 0]  # total nilai bidak per warna, juga incremental
         self._setup_initial()
 
     def _setup_initial(self):
-        # Setup bidak putih (row 7 & 6) dan hitam (row 0 & 1)
-        # Hitam
-        self.grid[0] = [
-            ('b', 'R'), ('b', 'N'), ('b', 'B'), ('b', 'Q'),
-            ('b', 'K'), ('b', 'B'), ('b', 'N'), ('b', 'R')
-        ]
-        self.grid[1] = [('b', 'P') for _ in range(BOARD_SIZE)]
-        # Kosong tengah
-        for r in range(2, 6):
-            self.grid[r] = [None for _ in range(BOARD_SIZE)]
-        # Putih
-        self.grid[6] = [('w', 'P') for _ in range(BOARD_SIZE)]
-        self.grid[7] = [
-            ('w', 'R'), ('w', 'N'), ('w', 'B'), ('w', 'Q'),
-            ('w', 'K'), ('w', 'B'), ('w', 'N'), ('w', 'R')
-        ]
+        # Hitam di row 0 & 1 (square 0..15), putih di row 6 & 7 (square 48..63)
+        self.bb[B_R] = 0x0000000000000081
+        self.bb[B_N] = 0x0000000000000042
+        self.bb[B_B] = 0x0000000000000024
+        self.bb[B_Q] = 0x0000000000000008
+        self.bb[B_K] = 0x0000000000000010
+        self.bb[B_P] = 0x000000000000FF00
+        self.bb[W_P] = 0x00FF000000000000
+        self.bb[W_R] = 0x8100000000000000
+        self.bb[W_N] = 0x4200000000000000
+        self.bb[W_B] = 0x2400000000000000
+        self.bb[W_Q] = 0x0800000000000000
+        self.bb[W_K] = 0x1000000000000000
+        self.occ[B] = 0x000000000000FFFF
+        self.occ[W] = 0xFFFF000000000000
+        for piece in range(W_P, B_K + 1):
+            bits = self.bb[piece]
+            while bits:
+                lsb = bits & -bits
+                bits ^= lsb
+                self.squares[lsb.bit_length() - 1] = piece
+        self.hash = self._compute_hash()
+        self.material = self._compute_material()
+
+    def _compute_material(self) -> List[int]:
+        material = [0, 0]
+        for piece in range(W_P, B_K + 1):
+            material[PIECE_COLOR[piece]] += self.bb[piece].bit_count() * PIECE_VALUES[PIECE_TYPE[piece]]
+        return material
+
+    def _compute_hash(self) -> int:
+        h = 0
+        for sq, piece in enumerate(self.squares):
+            if piece:
+                h ^= ZOBRIST[piece][sq]
+        return h
 
     def in_bounds(self, r: int, c: int) -> bool:
         return 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE
 
-    def get(self, rc: Tuple[int, int]) -> Optional[Piece]:
+    def get(self, rc: Tuple[int, int]) -> Piece:
         r, c = rc
-        return self.grid[r][c]
+        return self.squares[r * BOARD_SIZE + c]
 
-    def set(self, rc: Tuple[int, int], piece: Optional[Piece]):
+    def set(self, rc: Tuple[int, int], piece: Piece):
         r, c = rc
-        self.grid[r][c] = piece
+        sq = r * BOARD_SIZE + c
+        old = self.squares[sq]
+        if old:
+            self._toggle(old, sq)
+        if piece:
+            self._toggle(piece, sq)
+
+    def _toggle(self, piece: Piece, sq: int):
+        bit = 1 << sq
+        self.hash ^= ZOBRIST[piece][sq]
+        self.bb[piece] ^= bit
+        color = PIECE_COLOR[piece]
+        if self.bb[piece] & bit:
+            self.squares[sq] = piece
+            self.material[color] += PIECE_VALUES[PIECE_TYPE[piece]]
+        else:
+            self.squares[sq] = EMPTY
+            self.material[color] -= PIECE_VALUES[PIECE_TYPE[piece]]
+        self.occ[color] ^= bit
 
     def move_piece(self, move: Move):
-        (r1, c1), (r2, c2), _ = move
-        piece = self.get((r1, c1))
-        captured = self.get((r2, c2))
-        self.set((r2, c2), piece)
-        self.set((r1, c1), None)
+        rc_from, rc_to = SQ_RC[move_from(move)], SQ_RC[move_to(move)]
+        piece = self.get(rc_from)
+        captured = self.get(rc_to)
+        self.set(rc_to, piece)
+        self.set(rc_from, EMPTY)
         return captured
 
+    def make(self, move: Move) -> Piece:
+        """
+        Jalankan move langsung pada papan (termasuk promosi yang di-encode di move).
+        Mengembalikan bidak yang bergerak sebagai info undo untuk unmake().
+        """
+        frm, to, captured, promo = move & 0x3F, (move >> 6) & 0x3F, (move >> 12) & 0xF, move >> 16
+        piece = self.squares[frm]
+        if captured:
+            self._toggle(captured, to)
+        self._toggle(piece, frm)
+        self._toggle(promo or piece, to)
+        return piece
+
+    def unmake(self, move: Move, piece: Piece):
+        frm, to, captured, promo = move & 0x3F, (move >> 6) & 0x3F, (move >> 12) & 0xF, move >> 16
+        self._toggle(promo or piece, to)
+        self._toggle(piece, frm)
+        if captured:
+            self._toggle(captured, to)
+
     def clone(self) -> "Board":
         b = Board.__new__(Board)
-        b.grid = [row.copy() for row in self.grid]
+        b.bb = self.bb.copy()
+        b.squares = self.squares[:]
+        b.occ = self.occ.copy()
+        b.hash = self.hash
+        b.material = self.material.copy()
         return b
 
-    def material_eval(self, color: str) -> int:
-        score = 0
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                p = self.grid[r][c]
-                if p:
-                    sign = 1 if p[0] == color else -1
-                    score += sign * PIECE_VALUES[p[1]]
-        return score
+    def material_eval(self, color: int) -> int:
+        # O(1): material di-update oleh _toggle setiap kali bidak dipasang/diangkat
+        return self.material[color] - self.material[ENEMY[color]]
+
+
+# ------------------------------
+# Attack Tables (dihitung sekali saat import)
+# ------------------------------
+
+KNIGHT_DIRS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+               (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_DIRS = [(-1, -1), (-1, 0), (-1, 1),
+             (0, -1),          (0, 1),
+             (1, -1),  (1, 0), (1, 1)]
+
+ROOK_DIRS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+QUEEN_DIRS = ROOK_DIRS + BISHOP_DIRS
+
+# Index arah untuk RAY[sq][d]: 0..3 lurus (ROOK_DIRS), 4..7 diagonal (BISHOP_DIRS)
+ROOK_RAYS = (0, 1, 2, 3)
+BISHOP_RAYS = (4, 5, 6, 7)
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+# Arah yang menaikkan index square: blocker pertama = bit terendah, selain itu bit tertinggi
+RAY_POSITIVE = [dr * BOARD_SIZE + dc > 0 for dr, dc in QUEEN_DIRS]
+
+
+def _build_step_table(dirs: List[Tuple[int, int]]) -> List[int]:
+    table = [0] * (BOARD_SIZE * BOARD_SIZE)
+    for sq in range(BOARD_SIZE * BOARD_SIZE):
+        r, c = divmod(sq, BOARD_SIZE)
+        for dr, dc in dirs:
+            rr, cc = r + dr, c + dc
+            if 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE:
+                table[sq] |= 1 << (rr * BOARD_SIZE + cc)
+    return table
+
+
+def _build_rays() -> List[List[int]]:
+    rays = []
+    for sq in range(BOARD_SIZE * BOARD_SIZE):
+        r, c = divmod(sq, BOARD_SIZE)
+        per_dir = []
+        for dr, dc in QUEEN_DIRS:
+            ray = 0
+            rr, cc = r + dr, c + dc
+            while 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE:
+                ray |= 1 << (rr * BOARD_SIZE + cc)
+                rr += dr
+                cc += dc
+            per_dir.append(ray)
+        rays.append(per_dir)
+    return rays
+
+
+KNIGHT_ATTACKS = _build_step_table(KNIGHT_DIRS)
+KING_ATTACKS = _build_step_table(KING_DIRS)
+RAY = _build_rays()
+# Petak yang diserang pion (makan diagonal) per warna
+PAWN_ATTACKS = (
+    _build_step_table([(-1, -1), (-1, 1)]),  # W
+    _build_step_table([(1, -1), (1, 1)]),  # B
+)
+# Rank promosi per warna sebagai bitmask
+PROMO_RANK_MASK = (0x00000000000000FF, 0xFF00000000000000)
+# Rank hasil maju satu langkah dari rank awal; pion di sini boleh maju satu lagi (start double)
+DOUBLE_PUSH_RANK_MASK = (0x0000FF0000000000, 0x0000000000FF0000)
+# Selisih square pion maju satu langkah per warna
+PAWN_STEP = (-BOARD_SIZE, BOARD_SIZE)
+FULL_BOARD = (1 << (BOARD_SIZE * BOARD_SIZE)) - 1
+
+
+def slider_attacks(sq: int, occ: int, ray_dirs: Tuple[int, ...]) -> int:
+    # Classic approach: potong ray setelah blocker pertama
+    attacks = 0
+    rays = RAY[sq]
+    for d in ray_dirs:
+        ray = rays[d]
+        blockers = ray & occ
+        if blockers:
+            if RAY_POSITIVE[d]:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAY[first][d]
+        attacks |= ray
+    return attacks
 
 
 class Rules:
@@ -119,187 +323,342 @@ class Rules:
     Termasuk: Pion (jalan, makan, start-double), Kuda, Gajah, Benteng, Ratu, Raja.
     Tidak termasuk: en passant, castling. Promosi otomatis ke Queen.
     """
-    KNIGHT_DIRS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                   (1, -2), (1, 2), (2, -1), (2, 1)]
-    KING_DIRS = [(-1, -1), (-1, 0), (-1, 1),
-                 (0, -1),          (0, 1),
-                 (1, -1),  (1, 0), (1, 1)]
+    KNIGHT_DIRS = KNIGHT_DIRS
+    KING_DIRS = KING_DIRS
 
-    ROOK_DIRS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    BISHOP_DIRS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-    QUEEN_DIRS = ROOK_DIRS + BISHOP_DIRS
+    ROOK_DIRS = ROOK_DIRS
+    BISHOP_DIRS = BISHOP_DIRS
+    QUEEN_DIRS = QUEEN_DIRS
 
     def __init__(self):
         pass
 
-    def is_enemy(self, a: Optional[Piece], b: Optional[Piece]) -> bool:
-        if not a or not b:
-            return False
-        return a[0] != b[0]
+    def is_enemy(self, a: Piece, b: Piece) -> bool:
+        return a != EMPTY and b != EMPTY and PIECE_COLOR[a] != PIECE_COLOR[b]
 
     def generate_moves_for_piece(self, board: Board, rc: Tuple[int, int]) -> List[Move]:
         r, c = rc
-        piece = board.get((r, c))
+        sq = r * BOARD_SIZE + c
+        piece = board.squares[sq]
         if not piece:
             return []
-        color, ptype = piece
-        moves: List[Move] = []
-
-        if ptype == 'P':
-            dir_forward = -1 if color == 'w' else 1
-            start_rank = 6 if color == 'w' else 1
-            # maju 1
-            r1 = r + dir_forward
-            if board.in_bounds(r1, c) and board.get((r1, c)) is None:
-                moves.append(((r, c), (r1, c), None))
-                # start double
-                r2 = r + 2 * dir_forward
-                if r == start_rank and board.in_bounds(r2, c) and board.get((r2, c)) is None:
-                    moves.append(((r, c), (r2, c), None))
-            # makan
-            for dc in (-1, 1):
-                cc = c + dc
-                rr = r + dir_forward
-                if board.in_bounds(rr, cc):
-                    target = board.get((rr, cc))
-                    if self.is_enemy(piece, target):
-                        moves.append(((r, c), (rr, cc), target))
-            # promosi akan ditangani saat eksekusi move (di Game/AI) secara otomatis
-            return moves
-
-        if ptype == 'N':
-            for dr, dc in self.KNIGHT_DIRS:
-                rr, cc = r + dr, c + dc
-                if not board.in_bounds(rr, cc):
-                    continue
-                tgt = board.get((rr, cc))
-                if tgt is None or self.is_enemy(piece, tgt):
-                    moves.append(((r, c), (rr, cc), tgt))
-            return moves
-
-        if ptype == 'K':
-            for dr, dc in self.KING_DIRS:
-                rr, cc = r + dr, c + dc
-                if not board.in_bounds(rr, cc):
-                    continue
-                tgt = board.get((rr, cc))
-                if tgt is None or self.is_enemy(piece, tgt):
-                    moves.append(((r, c), (rr, cc), tgt))
-            # castling: diabaikan untuk kesederhanaan
-            return moves
-
-        # Sliding pieces
-        dirs = []
-        if ptype == 'R':
-            dirs = self.ROOK_DIRS
-        elif ptype == 'B':
-            dirs = self.BISHOP_DIRS
-        elif ptype == 'Q':
-            dirs = self.QUEEN_DIRS
-
-        for dr, dc in dirs:
-            rr, cc = r + dr, c + dc
-            while board.in_bounds(rr, cc):
-                tgt = board.get((rr, cc))
-                if tgt is None:
-                    moves.append(((r, c), (rr, cc), None))
-                else:
-                    if self.is_enemy(piece, tgt):
-                        moves.append(((r, c), (rr, cc), tgt))
-                    break
-                rr += dr
-                cc += dc
-
-        return moves
-
-    def all_moves(self, board: Board, color: str) -> List[Move]:
-        res: List[Move] = []
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                p = board.get((r, c))
-                if p and p[0] == color:
-                    res.extend(self.generate_moves_for_piece(board, (r, c)))
-        return res
+        color, ptype, bit = PIECE_COLOR[piece], PIECE_TYPE[piece], 1 << sq
+        out = [0] * MOVE_BUF_SIZE
+        if ptype == PAWN:
+            n = self._gen_pawns(board, color, bit, out, 0)
+        elif ptype == KNIGHT:
+            n = self._gen_steppers(board, color, bit, KNIGHT_ATTACKS, out, 0)
+        elif ptype == KING:
+            n = self._gen_steppers(board, color, bit, KING_ATTACKS, out, 0)
+        elif ptype == ROOK:
+            n = self._gen_sliders(board, color, bit, ROOK_RAYS, out, 0)
+        elif ptype == BISHOP:
+            n = self._gen_sliders(board, color, bit, BISHOP_RAYS, out, 0)
+        else:
+            n = self._gen_sliders(board, color, bit, QUEEN_RAYS, out, 0)
+        return out[:n]
+
+    def all_moves(self, board: Board, color: int, out: List[Move], start: int = 0,
+                  captures_only: bool = False) -> int:
+        """
+        Tulis semua pseudolegal move `color` ke buffer milik pemanggil mulai out[start].
+        Dibangkitkan per jenis bidak (bitboard jenis itu saja), bukan per petak.
+        captures_only: hanya capture dan promosi (untuk quiescence search).
+        Mengembalikan index setelah move terakhir (jumlah move = hasil - start).
+        """
+        bb = board.bb
+        off = COLOR_OFFSET[color]
+        n = self._gen_pawns(board, color, bb[off + PAWN], out, start, captures_only)
+        n = self._gen_steppers(board, color, bb[off + KNIGHT], KNIGHT_ATTACKS, out, n, captures_only)
+        n = self._gen_sliders(board, color, bb[off + BISHOP], BISHOP_RAYS, out, n, captures_only)
+        n = self._gen_sliders(board, color, bb[off + ROOK], ROOK_RAYS, out, n, captures_only)
+        n = self._gen_sliders(board, color, bb[off + QUEEN], QUEEN_RAYS, out, n, captures_only)
+        # castling: diabaikan untuk kesederhanaan
+        n = self._gen_steppers(board, color, bb[off + KING], KING_ATTACKS, out, n, captures_only)
+        return n
+
+    def capture_moves(self, board: Board, color: int, out: List[Move], start: int = 0) -> int:
+        # Seperti all_moves, tapi hanya capture dan promosi
+        return self.all_moves(board, color, out, start, True)
+
+    def _gen_pawns(self, board: Board, color: int, pawns: int, out: List[Move], n: int,
+                   captures_only: bool = False) -> int:
+        own, enemy = board.occ[color], board.occ[ENEMY[color]]
+        empty = ~(own | enemy) & FULL_BOARD
+        squares = board.squares
+        step = PAWN_STEP[color]
+        promo_rank = PROMO_RANK_MASK[color]
+        # Promosi otomatis ke Queen: id Queen warna sama di-encode pada move ke rank terakhir
+        queen = COLOR_OFFSET[color] + QUEEN
+
+        # Maju satu/dua langkah untuk semua pion sekaligus (shift bitboard)
+        if color == W:
+            single = (pawns >> BOARD_SIZE) & empty
+            double = ((single & DOUBLE_PUSH_RANK_MASK[W]) >> BOARD_SIZE) & empty
+        else:
+            single = (pawns << BOARD_SIZE) & empty
+            double = ((single & DOUBLE_PUSH_RANK_MASK[B]) << BOARD_SIZE) & empty
+        if captures_only:
+            single &= promo_rank
+            double = 0
+        while single:
+            lsb = single & -single
+            single ^= lsb
+            to = lsb.bit_length() - 1
+            out[n] = (to - step) | to << 6 | (queen << 16 if lsb & promo_rank else 0)
+            n += 1
+        while double:
+            lsb = double & -double
+            double ^= lsb
+            to = lsb.bit_length() - 1
+            out[n] = (to - 2 * step) | to << 6
+            n += 1
+
+        # Makan diagonal
+        attacks = PAWN_ATTACKS[color]
+        while pawns:
+            lsb = pawns & -pawns
+            pawns ^= lsb
+            sq = lsb.bit_length() - 1
+            targets = attacks[sq] & enemy
+            while targets:
+                lsb = targets & -targets
+                targets ^= lsb
+                to = lsb.bit_length() - 1
+                out[n] = sq | to << 6 | squares[to] << 12 | (queen << 16 if lsb & promo_rank else 0)
+                n += 1
+        return n
+
+    def _gen_steppers(self, board: Board, color: int, pieces: int, table: List[int], out: List[Move], n: int,
+                      captures_only: bool = False) -> int:
+        # Kuda / raja: target langsung dari tabel serangan
+        own, enemy = board.occ[color], board.occ[ENEMY[color]]
+        mask = enemy if captures_only else ~own
+        squares = board.squares
+        while pieces:
+            lsb = pieces & -pieces
+            pieces ^= lsb
+            sq = lsb.bit_length() - 1
+            # targets tidak memuat petak sendiri, jadi isi mailbox di tujuan = bidak yang dimakan / EMPTY
+            targets = table[sq] & mask
+            while targets:
+                lsb = targets & -targets
+                targets ^= lsb
+                to = lsb.bit_length() - 1
+                out[n] = sq | to << 6 | squares[to] << 12
+                n += 1
+        return n
+
+    def _gen_sliders(self, board: Board, color: int, pieces: int, ray_dirs: Tuple[int, ...], out: List[Move],
+                     n: int, captures_only: bool = False) -> int:
+        # Gajah / benteng / ratu: ray dipotong di blocker pertama
+        own, enemy = board.occ[color], board.occ[ENEMY[color]]
+        occ = own | enemy
+        mask = enemy if captures_only else ~own
+        squares = board.squares
+        while pieces:
+            lsb = pieces & -pieces
+            pieces ^= lsb
+            sq = lsb.bit_length() - 1
+            targets = slider_attacks(sq, occ, ray_dirs) & mask
+            while targets:
+                lsb = targets & -targets
+                targets ^= lsb
+                to = lsb.bit_length() - 1
+                out[n] = sq | to << 6 | squares[to] << 12
+                n += 1
+        return n
+
+    def square_attacked_by(self, board: Board, sq: int, color: int) -> bool:
+        # Cek mundur dari petak: adakah bidak `color` di posisi yang menyerang petak ini
+        bb = board.bb
+        off = COLOR_OFFSET[color]
+        if PAWN_ATTACKS[ENEMY[color]][sq] & bb[off + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & bb[off + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & bb[off + KING]:
+            return True
+        occ = board.occ[W] | board.occ[B]
+        rooks = bb[off + ROOK] | bb[off + QUEEN]
+        if rooks and slider_attacks(sq, occ, ROOK_RAYS) & rooks:
+            return True
+        bishops = bb[off + BISHOP] | bb[off + QUEEN]
+        if bishops and slider_attacks(sq, occ, BISHOP_RAYS) & bishops:
+            return True
+        return False
 
     def apply_promotion_if_any(self, board: Board, move: Move):
         # Promosi otomatis ke Queen bila pion mencapai rank terakhir
-        (r1, c1), (r2, c2), _ = move
+        r2, c2 = SQ_RC[move_to(move)]
         p = board.get((r2, c2))
-        if not p:
+        if PIECE_TYPE[p] != PAWN:
             return
-        color, ptype = p
-        if ptype != 'P':
-            return
-        if (color == 'w' and r2 == 0) or (color == 'b' and r2 == BOARD_SIZE - 1):
-            board.set((r2, c2), (color, 'Q'))
+        color = PIECE_COLOR[p]
+        if r2 == PROMO_RANK[color]:
+            board.set((r2, c2), p + QUEEN - PAWN)
 
 
 # ------------------------------
-# Simple AI (Greedy Capture)
+# Search AI (Negamax + Alpha-Beta)
 # ------------------------------
 
-class GreedyAI:
+class SearchAI:
     """
-    AI sederhana:
-    - Cari tangkapan "aman" terbaik (tujuan tidak bisa dibalas langsung).
-    - Jika tidak ada, pilih tangkapan terbaik menurut delta material.
-    - Jika tetap tidak ada, pilih langkah acak/pertahankan sederhana (first legal).
+    AI berbasis pencarian:
+    - Negamax dengan alpha-beta pruning; di daun quiescence search (capture saja) sampai posisi tenang.
+    - Iterative deepening 1..max_depth; langkah terbaik iterasi sebelumnya dicoba duluan.
+    - Transposition table (Zobrist hash) menyimpan (depth, score, bound, best_move).
+    - Urutan langkah: langkah TT/PV, capture (MVV-LVA), killer move, lalu quiet menurut history heuristic.
     """
-    def __init__(self, rules: Rules):
-        self.rules = rules
+    TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+    # Skor urutan: langkah TT paling atas, lalu capture, killer, lalu quiet (history)
+    ORDER_TT, ORDER_CAPTURE, ORDER_KILLER = 1 << 30, 1 << 24, 1 << 23
 
-    def choose_move(self, board: Board, color: str) -> Optional[Move]:
-        moves = self.rules.all_moves(board, color)
-        if not moves:
-            return None
-
-        # 1) Cari capture yang aman dan terbaik
-        safe_captures = []
-        for mv in moves:
-            (r1, c1), (r2, c2), captured = mv
-            if captured is None:
-                continue
-            gain = PIECE_VALUES[captured[1]]
-            if self._is_destination_safe_after_move(board, mv, color):
-                safe_captures.append((gain, mv))
-        if safe_captures:
-            safe_captures.sort(key=lambda x: x[0], reverse=True)
-            return safe_captures[0][1]
-
-        # 2) Kalau tidak ada safe capture, pilih capture dengan delta terbaik (gain - value moved if recaptured)
-        scored_caps = []
-        for mv in moves:
-            (r1, c1), (r2, c2), captured = mv
-            if captured is None:
-                continue
-            gain = PIECE_VALUES[captured[1]]
-            # naive: kurangi dengan kemungkinan kehilangan piece yang bergerak (nilai piece sendiri)
-            moving_piece = board.get((r1, c1))
-            move_cost = PIECE_VALUES[moving_piece[1]] if moving_piece else 0
-            scored_caps.append((gain - move_cost / 2.0, mv))
-        if scored_caps:
-            scored_caps.sort(key=lambda x: x[0], reverse=True)
-            return scored_caps[0][1]
-
-        # 3) Tidak ada capture, pilih langkah pertama yang sah
-        return moves[0]
-
-    def _is_destination_safe_after_move(self, board: Board, move: Move, color: str) -> bool:
-        # Cek apakah setelah menjalankan move, kotak tujuan diserang lawan
-        enemy = 'b' if color == 'w' else 'w'
-        (r1, c1), (r2, c2), _ = move
-        sim = board.clone()
-        sim.move_piece(move)
-
-        # setelah pindah, promosi bisa mengubah piece yang berada di (r2,c2)
-        Rules().apply_promotion_if_any(sim, move)
-
-        enemy_moves = Rules().all_moves(sim, enemy)
-        for em in enemy_moves:
-            _, (er2, ec2), _ = em
-            if (er2, ec2) == (r2, c2):
-                return False
-        return True
+    def __init__(self, rules: Rules, max_depth: int = AI_DEPTH):
+        self.rules = rules
+        self.max_depth = max_depth
+        self.tt: Dict[int, Tuple[int, int, int, Optional[Move]]] = {}
+        # History heuristic diindeks dengan (from | to << 6) = 12 bit terendah move
+        self.history: List[int] = [0] * 4096
+        # Dua killer move (quiet yang memicu beta cutoff) per ply
+        self.killers: List[List[Move]] = [[0, 0] for _ in range(MAX_PLY)]
+        # Buffer move + skor urutan dipakai ulang di seluruh pencarian.
+        # Tiap node memakai segmen [start, end); anaknya mulai menulis dari end.
+        self._move_buf: List[Move] = [0] * (MOVE_BUF_SIZE * MAX_PLY)
+        self._score_buf: List[int] = [0] * (MOVE_BUF_SIZE * MAX_PLY)
+
+    def choose_move(self, board: Board, color: int) -> Optional[Move]:
+        return self.iterative_deepening(board, color, self.max_depth)
+
+    def iterative_deepening(self, board: Board, color: int, max_depth: int) -> Optional[Move]:
+        best: Optional[Move] = None
+        self.history = [0] * 4096
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        for depth in range(1, max_depth + 1):
+            _, mv = self.negamax(board, depth, -MATE_SCORE * 2, MATE_SCORE * 2, color, best)
+            if mv:
+                best = mv
+        return best
+
+    def negamax(self, board: Board, depth: int, alpha: int, beta: int, color: int,
+                first: Optional[Move] = None, start: int = 0, ply: int = 0) -> Tuple[int, Optional[Move]]:
+        # Raja sendiri sudah dimakan: kalah, makin cepat makin buruk
+        if not board.bb[COLOR_OFFSET[color] + KING]:
+            return -MATE_SCORE - depth, None
+        if depth == 0:
+            return self.quiesce(board, alpha, beta, color, start), None
+
+        key = board.hash ^ ZOBRIST_SIDE[color]
+        alpha_orig = alpha
+        entry = self.tt.get(key)
+        if entry:
+            tt_depth, tt_score, bound, tt_move = entry
+            if tt_depth >= depth:
+                if bound == self.TT_EXACT:
+                    return tt_score, tt_move
+                if bound == self.TT_LOWER and tt_score >= beta:
+                    return tt_score, tt_move
+                if bound == self.TT_UPPER and tt_score <= alpha:
+                    return tt_score, tt_move
+            if tt_move:
+                first = tt_move
+
+        buf, scores = self._move_buf, self._score_buf
+        end = self.rules.all_moves(board, color, buf, start)
+        if end == start:
+            return board.material_eval(color), None
+        killers = self.killers[ply]
+        self.score_moves(board, start, end, first, killers)
+
+        enemy = ENEMY[color]
+        best_score = -MATE_SCORE * 2
+        best_move: Optional[Move] = None
+        # Ikat method ke variabel lokal: hindari lookup atribut di loop terpanas
+        make, unmake, negamax = board.make, board.unmake, self.negamax
+        for i in range(start, end):
+            # Selection lazy: tukar move berskor tertinggi yang tersisa ke posisi i
+            j = max(range(i, end), key=scores.__getitem__)
+            if j != i:
+                buf[i], buf[j] = buf[j], buf[i]
+                scores[i], scores[j] = scores[j], scores[i]
+            mv = buf[i]
+            undo = make(mv)
+            score = -negamax(board, depth - 1, -beta, -alpha, enemy, None, end, ply + 1)[0]
+            unmake(mv, undo)
+            if score > best_score:
+                best_score, best_move = score, mv
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not (mv >> 12) & 0xF:
+                    self.history[mv & 0xFFF] += depth * depth
+                    if killers[0] != mv:
+                        killers[1] = killers[0]
+                        killers[0] = mv
+                break
+
+        if best_score <= alpha_orig:
+            bound = self.TT_UPPER
+        elif best_score >= beta:
+            bound = self.TT_LOWER
+        else:
+            bound = self.TT_EXACT
+        # Skema "always replace"; kosongkan seluruh tabel bila melewati kapasitas
+        if len(self.tt) >= TT_CAP:
+            self.tt.clear()
+        self.tt[key] = (depth, best_score, bound, best_move)
+        return best_score, best_move
+
+    def quiesce(self, board: Board, alpha: int, beta: int, color: int, start: int = 0) -> int:
+        # Lanjutkan hanya capture sampai posisi tenang, agar evaluasi tidak berhenti di tengah pertukaran
+        if not board.bb[COLOR_OFFSET[color] + KING]:
+            return -MATE_SCORE
+        stand = board.material_eval(color)
+        if stand >= beta:
+            return beta
+        if stand > alpha:
+            alpha = stand
+
+        buf, scores = self._move_buf, self._score_buf
+        end = self.rules.capture_moves(board, color, buf, start)
+        self.score_moves(board, start, end)
+        enemy = ENEMY[color]
+        make, unmake, quiesce = board.make, board.unmake, self.quiesce
+        for i in range(start, end):
+            j = max(range(i, end), key=scores.__getitem__)
+            if j != i:
+                buf[i], buf[j] = buf[j], buf[i]
+                scores[i], scores[j] = scores[j], scores[i]
+            mv = buf[i]
+            undo = make(mv)
+            score = -quiesce(board, -beta, -alpha, enemy, end)
+            unmake(mv, undo)
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def score_moves(self, board: Board, start: int, end: int, first: Optional[Move] = None,
+                    killers: Optional[List[Move]] = None):
+        # Isi skor urutan untuk buf[start:end]: langkah TT/PV, capture (MVV-LVA), killer, lalu history
+        buf, scores, history, squares = self._move_buf, self._score_buf, self.history, board.squares
+        killer0, killer1 = killers if killers else (0, 0)
+        for i in range(start, end):
+            mv = buf[i]
+            if mv == first:
+                scores[i] = self.ORDER_TT
+            elif (mv >> 12) & 0xF:
+                # MVV-LVA: korban paling berharga dulu, lalu penyerang paling murah
+                scores[i] = (self.ORDER_CAPTURE + 10 * ORDER_VALUES[PIECE_TYPE[(mv >> 12) & 0xF]]
+                             - ORDER_VALUES[PIECE_TYPE[squares[mv & 0x3F]]])
+            elif mv == killer0:
+                scores[i] = self.ORDER_KILLER + 1
+            elif mv == killer1:
+                scores[i] = self.ORDER_KILLER
+            else:
+                scores[i] = history[mv & 0xFFF]
 
 
 # ------------------------------
@@ -307,6 +666,16 @@ class GreedyAI:
 # ------------------------------
 
 def get_font():
+    size = int(SQ_SIZE * 0.8)
+    # Pakai file font hasil resolve sebelumnya bila masih ada (tanpa scan font sistem)
+    try:
+        with open(FONT_CACHE_PATH, encoding="utf-8") as f:
+            cached = f.read().strip()
+        if cached and os.path.isfile(cached):
+            return pygame.font.Font(cached, size)
+    except Exception:
+        pass
+
     # Cari font yang memiliki glyph chess unicode
     # Beberapa font umum: "Segoe UI Symbol", "DejaVu Sans", "Noto Sans Symbols"
     candidates = [
@@ -316,16 +685,23 @@ def get_font():
         "Arial Unicode MS",
         "Symbola",
         "FreeSerif",
-        None  # fallback default
     ]
     for name in candidates:
+        # Lewati font yang tidak terpasang tanpa membuat objek Font
+        path = pygame.font.match_font(name)
+        if not path:
+            continue
         try:
-            font = pygame.font.SysFont(name, int(SQ_SIZE * 0.8), bold=False)
-            if font:
-                return font
+            font = pygame.font.Font(path, size)
         except Exception:
             continue
-    return pygame.font.SysFont(None, int(SQ_SIZE * 0.8))
+        try:
+            with open(FONT_CACHE_PATH, "w", encoding="utf-8") as f:
+                f.write(path)
+        except OSError:
+            pass
+        return font
+    return pygame.font.SysFont(None, size)  # fallback default
 
 
 def draw_board(surface: pygame.Surface):
@@ -335,31 +711,51 @@ def draw_board(surface: pygame.Surface):
             pygame.draw.rect(surface, color, pygame.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
 
 
+# Overlay (highlight petak, titik hint quiet, titik hint capture), dibuat sekali saat pertama dipakai
+_OVERLAYS: Optional[Tuple[pygame.Surface, pygame.Surface, pygame.Surface]] = None
+
+
+def _get_overlays() -> Tuple[pygame.Surface, pygame.Surface, pygame.Surface]:
+    global _OVERLAYS
+    if _OVERLAYS is None:
+        highlight = pygame.Surface((SQ_SIZE, SQ_SIZE), pygame.SRCALPHA)
+        highlight.fill((*HIGHLIGHT, 80))
+        radius = max(6, SQ_SIZE // 8)
+        dots = []
+        for color in (MOVE_HINT, CAPTURE_HINT):
+            dot = pygame.Surface((SQ_SIZE, SQ_SIZE), pygame.SRCALPHA)
+            pygame.draw.circle(dot, color, (SQ_SIZE // 2, SQ_SIZE // 2), radius)
+            dots.append(dot)
+        _OVERLAYS = (highlight, dots[0], dots[1])
+    return _OVERLAYS
+
+
 def draw_highlight(surface: pygame.Surface, selected: Optional[Tuple[int, int]], moves: List[Move]):
+    highlight, quiet_dot, capture_dot = _get_overlays()
     if selected:
         r, c = selected
-        s = pygame.Surface((SQ_SIZE, SQ_SIZE), pygame.SRCALPHA)
-        s.fill((*HIGHLIGHT, 80))
-        surface.blit(s, (c * SQ_SIZE, r * SQ_SIZE))
+        surface.blit(highlight, (c * SQ_SIZE, r * SQ_SIZE))
 
     # Hint gerakan dari petak terpilih
-    for (_, _), (r2, c2), captured in moves:
-        center = (c2 * SQ_SIZE + SQ_SIZE // 2, r2 * SQ_SIZE + SQ_SIZE // 2)
-        radius = max(6, SQ_SIZE // 8)
-        color = MOVE_HINT if captured is None else (180, 50, 50)
-        pygame.draw.circle(surface, color, center, radius)
+    for mv in moves:
+        r2, c2 = SQ_RC[move_to(mv)]
+        dot = capture_dot if move_captured(mv) else quiet_dot
+        surface.blit(dot, (c2 * SQ_SIZE, r2 * SQ_SIZE))
 
 
-def draw_pieces(surface: pygame.Surface, board: Board, font: pygame.font.Font):
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            piece = board.get((r, c))
-            if piece:
-                glyph = UNICODE_PIECES.get(piece)
-                if glyph:
-                    text = font.render(glyph, True, TEXT_COLOR)
-                    text_rect = text.get_rect(center=(c * SQ_SIZE + SQ_SIZE // 2, r * SQ_SIZE + SQ_SIZE // 2))
-                    surface.blit(text, text_rect)
+def render_glyphs(font: pygame.font.Font) -> List[Optional[pygame.Surface]]:
+    # Render glyph tiap id bidak sekali saja; diindeks sama seperti UNICODE_PIECES
+    return [font.render(glyph, True, TEXT_COLOR) if glyph else None for glyph in UNICODE_PIECES]
+
+
+def draw_pieces(surface: pygame.Surface, board: Board, glyphs: List[Optional[pygame.Surface]]):
+    for sq, piece in enumerate(board.squares):
+        if piece:
+            text = glyphs[piece]
+            if text:
+                r, c = SQ_RC[sq]
+                text_rect = text.get_rect(center=(c * SQ_SIZE + SQ_SIZE // 2, r * SQ_SIZE + SQ_SIZE // 2))
+                surface.blit(text, text_rect)
 
 
 # ------------------------------
@@ -373,18 +769,23 @@ class Game:
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         self.clock = pygame.time.Clock()
         self.font = get_font()
+        # Cache render: glyph bidak dan papan kotak-kotak cukup dibuat sekali
+        self.glyph_surfaces = render_glyphs(self.font)
+        self.board_surface = pygame.Surface((WIDTH, HEIGHT))
+        draw_board(self.board_surface)
 
         self.board = Board()
         self.rules = Rules()
-        self.ai = GreedyAI(self.rules)
+        self.ai = SearchAI(self.rules)
 
-        self.turn = 'w'  # putih mulai
+        self.turn = W  # putih mulai
         self.selected: Optional[Tuple[int, int]] = None
         self.cached_moves_from_selected: List[Move] = []
         self.running = True
+        self.dirty = True  # render ulang hanya bila state berubah
 
         # Opsi: AI main hitam
-        self.ai_color = 'b'
+        self.ai_color = B
 
     def run(self):
         while self.running:
@@ -400,16 +801,18 @@ class Game:
                     # Tidak ada gerak: game over sederhana
                     self.running = False
 
-            self._render()
+            if self.dirty:
+                self._render()
+                self.dirty = False
             self.clock.tick(FPS)
 
         pygame.quit()
         sys.exit(0)
 
     def _render(self):
-        draw_board(self.screen)
+        self.screen.blit(self.board_surface, (0, 0))
         draw_highlight(self.screen, self.selected, self.cached_moves_from_selected)
-        draw_pieces(self.screen, self.board, self.font)
+        draw_pieces(self.screen, self.board, self.glyph_surfaces)
         pygame.display.flip()
 
     def _square_from_mouse(self, pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
@@ -425,6 +828,9 @@ class Game:
             if event.type == pygame.QUIT:
                 self.running = False
                 return
+            if event.type == pygame.WINDOWEXPOSED:
+                # Jendela tertutup/di-restore: isi layar perlu digambar ulang
+                self.dirty = True
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if self.turn == self.ai_color:
                     # Disable input saat AI berpikir/jalan
@@ -434,10 +840,11 @@ class Game:
                     self._on_click(rc)
 
     def _on_click(self, rc: Tuple[int, int]):
+        self.dirty = True
         p = self.board.get(rc)
         if self.selected is None:
             # pilih bidak milik pemain turn
-            if p and p[0] == self.turn:
+            if p and PIECE_COLOR[p] == self.turn:
                 self.selected = rc
                 self.cached_moves_from_selected = self._filter_own_moves(rc)
         else:
@@ -449,7 +856,7 @@ class Game:
                 self.cached_moves_from_selected = []
             else:
                 # jika klik bidak sendiri lain -> ganti pilihan
-                if p and p[0] == self.turn:
+                if p and PIECE_COLOR[p] == self.turn:
                     self.selected = rc
                     self.cached_moves_from_selected = self._filter_own_moves(rc)
                 else:
@@ -463,11 +870,9 @@ class Game:
         return allm
 
     def _find_move_from_selected_to(self, dst: Tuple[int, int]) -> Optional[Move]:
-        for mv in self.cached_moves_from_selected:
-            (_, _), (r2, c2), _ = mv
-            if (r2, c2) == dst:
-                return mv
-        return None
+        r, c = dst
+        dst_sq = r * BOARD_SIZE + c
+        return next((mv for mv in self.cached_moves_from_selected if move_to(mv) == dst_sq), None)
 
     def _execute_move(self, move: Move):
         # Jalankan move
@@ -475,7 +880,8 @@ class Game:
         # Promosi jika perlu
         self.rules.apply_promotion_if_any(self.board, move)
         # Ganti giliran
-        self.turn = 'b' if self.turn == 'w' else 'w'
+        self.turn = ENEMY[self.turn]
+        self.dirty = True
 
 
 # ------------------------------